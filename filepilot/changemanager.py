@@ -1,58 +1,79 @@
 import os
 import shutil
-import re
-import xml.etree.ElementTree as ET
-from datetime import datetime
 from pathlib import Path
 from tempfile import NamedTemporaryFile
-from rich.console import Console
-from rich.prompt import Confirm
 from rich.table import Table
-from typing import List, Dict, Any
+from typing import List, Optional
 from .syntaxdiff import SyntaxDiff
+from .fileio import IO_BUFFER_SIZE, read_text
+from .config import VERBOSE
+from .console import console
 
 class NoChangesFoundError(Exception):
     """Raised when no change instructions were found in the response."""
     pass
 
+class EditInstruction:
+    """A single edit to apply to a file's content.
+
+    Actions are 'replace' (whole file), 'delete' (lines start..end, 1-based
+    and inclusive), 'insert' (before line start, or at the end when start is
+    None) and 'topins' (at the top of the file).
+    """
+    __slots__ = ('action', 'content', 'filename', 'start', 'end')
+
+    def __init__(self, action: str, content: str = '', filename: Optional[str] = None,
+                 start: Optional[int] = None, end: Optional[int] = None):
+        self.action = action
+        self.content = content
+        self.filename = filename
+        self.start = start
+        self.end = end
+
+    def __repr__(self) -> str:
+        return (f"EditInstruction(action={self.action!r}, filename={self.filename!r}, "
+                f"start={self.start!r}, end={self.end!r})")
+
 class ChangeManager:
     def __init__(self):
-        self.console = Console()
+        self.console = console
         self.visual_diff = SyntaxDiff()
         self.original_file = None
-        # Get verbose setting from environment
-        self.verbose = os.getenv('VERBOSE_MODE', '').lower() in ('true', '1', 'yes')
+        self.verbose = VERBOSE
 
     def read_file(self, filename: str) -> str:
         """Read and validate file content."""
-        path = Path(filename)
-        if not path.exists():
-            raise FileNotFoundError(f"File '{filename}' does not exist")
-            
-        return path.read_text(encoding='utf-8')
+        try:
+            return read_text(filename)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File '{filename}' does not exist") from None
     
     def create_preview_with_content(self, original_file: str, content: str) -> str:
         """Create preview file with given content."""
-        preview_file = self.create_preview_file(original_file)
-        with open(preview_file, 'w', encoding='utf-8') as f:
+        preview_file = self._create_empty_preview_file(original_file)
+        with open(preview_file, 'w', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
             f.write(content)
         return preview_file
 
     def create_preview_file(self, original_file: str) -> str:
         """Create a preview file using NamedTemporaryFile."""
-        self.original_file = original_file  # Set the original file path
-        # Get file extension from original file
-        _, ext = os.path.splitext(original_file)
-        
-        # Create temporary file with same extension that won't be deleted when closed
-        preview_file = NamedTemporaryFile(suffix=ext, delete=False)
-        preview_path = preview_file.name
+        preview_path = self._create_empty_preview_file(original_file)
         
         # Copy original content to temp file
         shutil.copy2(original_file, preview_path)
         
         return preview_path
 
+    def _create_empty_preview_file(self, original_file: str) -> str:
+        """Create an empty preview file with the same extension as the original."""
+        self.original_file = original_file  # Set the original file path
+        # Get file extension from original file
+        _, ext = os.path.splitext(original_file)
+        
+        # Create temporary file with same extension that won't be deleted when closed
+        with NamedTemporaryFile(suffix=ext, delete=False) as preview_file:
+            return preview_file.name
+
     def create_preview_dir(self, dirname: str) -> str:
         """Create a preview directory for directory structure operations."""
         self.original_file = dirname
@@ -86,7 +107,9 @@ class ChangeManager:
             self.console.print(f"Source: {preview_file}")
             self.console.print(f"Destination: {original_file}")
 
-        shutil.copy2(preview_file, original_file)
+        # Write into the existing file so its owner, permissions, ACLs,
+        # xattrs and hard links are kept (copyfile uses sendfile where it can)
+        shutil.copyfile(preview_file, original_file)
 
         if self.verbose:
             self.console.print("[green]Changes applied successfully[/green]")
@@ -105,8 +128,12 @@ class ChangeManager:
         if target_path.exists():
             shutil.rmtree(target_path)
         
-        # Copy entire directory structure
-        shutil.copytree(preview_dir, target_dir)
+        # Move the preview directory into place, copying only when it lives
+        # on another filesystem
+        try:
+            os.replace(preview_dir, target_dir)
+        except OSError:
+            shutil.copytree(preview_dir, target_dir)
 
         if self.verbose:
             self.console.print("[green]Directory structure applied successfully[/green]")
@@ -139,8 +166,12 @@ Please make the following changes:
 
         return prompt
 
-    def apply_edit_instructions_to_content(self, content: str, instructions: List[Dict[str, Any]]) -> str:
+    def apply_edit_instructions_to_content(self, content: str, instructions: List[EditInstruction]) -> str:
         """Apply edit instructions to content in forward order."""
+        # Nothing to apply, skip the split/join round-trip
+        if not instructions:
+            return content
+
         # Store whether original content had trailing newline
         had_trailing_newline = content.endswith('\n')
         # Remove trailing whitespace but preserve line endings
@@ -152,50 +183,52 @@ Please make the following changes:
             
         # Process instructions in forward order    
         for instr in instructions:
-            action = instr['action']
+            action = instr.action
             
             try:
                 if action == 'replace':
                     if self.verbose:
                         self.console.print(f"\n[yellow]Action:[/yellow] {action}")
                         self.console.print("[green]Replacing entire file:[/green]")
-                        self.console.print(f"[green]+ {instr['content']}[/green]")
+                        self.console.print(f"[green]+ {instr.content}[/green]")
                     # Return replaced content with newline only if original had one
-                    return instr['content'].rstrip() + ('\n' if had_trailing_newline else '')
+                    return instr.content.rstrip() + ('\n' if had_trailing_newline else '')
                     
                 elif action == 'delete':
-                    start = instr['start'] - 1  # Convert to 0-based index
-                    end = instr['end']  # end is inclusive
+                    start = instr.start - 1  # Convert to 0-based index
+                    end = instr.end  # end is inclusive
                     
                     if self.verbose:
                         self.console.print(f"\n[yellow]Action:[/yellow] {action}")
                         self.console.print(f"Range: {start+1}-{end}")
                         deleted_lines = lines[start:end]
                         self.console.print("[red]Deleted content:[/red]")
-                        for line in deleted_lines:
-                            self.console.print(f"[red]- {line}[/red]")
+                        # One print for the whole block; markup=False keeps
+                        # brackets in file content from being read as styles
+                        self.console.print("\n".join(f"- {line}" for line in deleted_lines), style="red", markup=False)
                     
-                    lines = lines[:start] + lines[end:]
+                    # Delete in place instead of rebuilding the whole list
+                    del lines[start:end]
                     
                 elif action == 'insert':
-                    start = instr['start'] - 1 if 'start' in instr else len(lines)
+                    start = instr.start - 1 if instr.start is not None else len(lines)
                     
                     if self.verbose:
                         self.console.print(f"\n[yellow]Action:[/yellow] {action}")
                         self.console.print("[green]Inserting:[/green]")
-                        self.console.print(f"[green]+ {instr['content']}[/green]")
+                        self.console.print(f"[green]+ {instr.content}[/green]")
                     
-                    new_lines = instr['content'].split('\n')
-                    lines = lines[:start] + new_lines + lines[start:]
+                    new_lines = instr.content.split('\n')
+                    lines[start:start] = new_lines
                     
                 elif action == 'topins':
                     if self.verbose:
                         self.console.print(f"\n[yellow]Action:[/yellow] {action}")
                         self.console.print("[green]Top inserting:[/green]")
-                        self.console.print(f"[green]+ {instr['content']}[/green]")
+                        self.console.print(f"[green]+ {instr.content}[/green]")
                     
-                    new_lines = instr['content'].split('\n')
-                    lines = new_lines + lines
+                    new_lines = instr.content.split('\n')
+                    lines[:0] = new_lines
                     
             except Exception as e:
                 self.console.print(f"[yellow]Warning:[/yellow] {str(e)}")
@@ -205,18 +238,21 @@ Please make the following changes:
         # Add back trailing newline if original had one
         return result + ('\n' if had_trailing_newline else '')
 
-    def apply_edit_instructions_to_file(self, filename: str, instructions: List[Dict[str, Any]]) -> None:
+    def apply_edit_instructions_to_file(self, filename: str, instructions: List[EditInstruction]) -> None:
         """Apply edit instructions to a file."""
-        with open(filename, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
+        content = self.read_file(filename)
         modified_content = self.apply_edit_instructions_to_content(content, instructions)
         
-        with open(filename, 'w', encoding='utf-8') as f:
+        # Write into the existing file so its owner, ACLs, xattrs and hard
+        # links are kept, with one large buffer instead of the 8 KiB default
+        with open(filename, 'w', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
             f.write(modified_content)
 
-    def display_instructions_table(self, instructions: List[Dict[str, Any]]) -> None:
-        """Display edit instructions in a formatted table."""
+    def display_instructions_table(self, instructions: List[EditInstruction]) -> None:
+        """Display edit instructions in a formatted table (verbose mode only)."""
+        if not self.verbose:
+            return
+
         table = Table(
             title="Change Instructions",
             show_header=True,
@@ -230,13 +266,13 @@ Please make the following changes:
         table.add_column("Content")
         
         for idx, instr in enumerate(instructions, 1):
-            action = instr.get('action', '')
-            line = str(instr.get('line', ''))
+            action = instr.action
+            line = str(instr.start) if instr.start is not None else ''
             
             if action == 'insert':
-                content = f"[green]+ {instr.get('content', '')}[/green]"
+                content = f"[green]+ {instr.content}[/green]"
             elif action == 'delete':
-                content = f"[red]- {instr['count']} lines[/red]"
+                content = f"[red]- {instr.end - instr.start + 1} lines[/red]"
             else:
                 content = ""  # Handle cases where content is not applicable
                 
@@ -246,8 +282,25 @@ Please make the following changes:
         self.console.print(table)
         self.console.print()
 
-    def parse_edit_instructions(self, response: str, original_content: str) -> List[Dict[str, Any]]:
+    def parse_edit_instructions(self, response: str, original_content: str) -> List[EditInstruction]:
         """Parse edit instructions from response text looking for complete file replacements."""
+        instructions = self._parse_outputfiles(response)
+
+        if not instructions:
+            raise NoChangesFoundError("No valid change instructions found")
+
+        if self.verbose:
+            self.console.print("\n[bold]Parsed Instructions:[/bold]")
+            for instr in instructions:
+                self.console.print(f"\n[yellow]Action:[/yellow] {instr.action}")
+                self.console.print(f"[cyan]File:[/cyan] {instr.filename}")
+                self.console.print("[green]New content:[/green]")
+                self.console.print("\n".join(f"+ {line}" for line in instr.content.splitlines()), style="green", markup=False)
+
+        return instructions
+
+    def _parse_outputfiles(self, response: str) -> List[EditInstruction]:
+        """Collect the <outputfile> sections of a response as 'replace' instructions."""
         instructions = []
         in_file_section = False
         in_content_section = False
@@ -263,11 +316,11 @@ Please make the following changes:
                 continue
             elif '</outputfile>' in stripped_line:
                 if filename and content_lines:
-                    instructions.append({
-                        'action': 'replace',
-                        'filename': filename,  # Include filename in instructions
-                        'content': '\n'.join(content_lines)
-                    })
+                    instructions.append(EditInstruction(
+                        action='replace',
+                        filename=filename,  # Include filename in instructions
+                        content='\n'.join(content_lines)
+                    ))
                 in_file_section = False
                 in_content_section = False
                 filename = None
@@ -291,18 +344,6 @@ Please make the following changes:
             if in_content_section:
                 content_lines.append(line)
 
-        if not instructions:
-            raise NoChangesFoundError("No valid change instructions found")
-
-        if self.verbose:
-            self.console.print("\n[bold]Parsed Instructions:[/bold]")
-            for instr in instructions:
-                self.console.print(f"\n[yellow]Action:[/yellow] {instr['action']}")
-                self.console.print(f"[cyan]File:[/cyan] {instr['filename']}")
-                self.console.print("[green]New content:[/green]")
-                for line in instr['content'].splitlines():
-                    self.console.print(f"[green]+ {line}[/green]")
-
         return instructions
 
     def parse_directory_structure(self, xml_content: str) -> dict:
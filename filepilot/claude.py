@@ -1,79 +1,242 @@
 import os
 import time
-from typing import Optional, List
-from anthropic import Anthropic
+from typing import Optional, List, Dict, Union
+from anthropic import Anthropic, AsyncAnthropic, APIError, NOT_GIVEN
 from anthropic.types import MessageParam
-from rich.console import Console
 from .changemanager import ChangeManager
+from .responsecache import ResponseCache
+from .config import VERBOSE
+from .console import console
 
-VERBOSE = os.getenv('VERBOSE_MODE', '').lower() in ('true', '1', 'yes')
-console = Console()
+MODEL = "claude-3-5-sonnet-20241022"
+# Attempts the SDK makes after a rate limit, overload or server error
+MAX_RETRIES = 5
+# Longest wait between two polls of a running message batch, in seconds
+MAX_BATCH_POLL_INTERVAL = 60
+# How long to wait for a message batch before giving up, in seconds
+MAX_BATCH_WAIT = 30 * 60
+MAX_CONTEXT_WINDOW = 200000
+MAX_OUTPUT_TOKENS = 4000
+# Tokens kept free for the system prompt, XML tags and estimation error
+CONTEXT_MARGIN = 2000
+# Rough token estimate used to budget reference files
+CHARS_PER_TOKEN = 4
+
+def _truncate_middle(content: str, max_chars: int) -> str:
+    """Keep the start and end of content within max_chars, marking the lines cut out."""
+    if len(content) <= max_chars:
+        return content
+    lines = content.splitlines(keepends=True)
+
+    head, size = 0, 0
+    while head < len(lines) and size + len(lines[head]) <= max_chars * 0.7:
+        size += len(lines[head])
+        head += 1
+
+    tail, size = len(lines), 0
+    while tail > head and size + len(lines[tail - 1]) <= max_chars * 0.3:
+        size += len(lines[tail - 1])
+        tail -= 1
+
+    return f"{''.join(lines[:head])}\n...[TRUNCATED {tail - head} lines]...\n{''.join(lines[tail:])}"
 
 class APIAgent:
-    def __init__(self, api_key: Optional[str] = None, system_prompt: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, system_prompt: Optional[str] = None, max_retries: int = MAX_RETRIES):
         self.api_key = api_key or os.environ.get("ANTHROPIC_API_KEY")
         if not self.api_key:
             raise ValueError("API key must be provided or set in ANTHROPIC_API_KEY environment variable")
-        self.client = Anthropic(api_key=self.api_key)
+        # The SDK retries with exponential backoff and jitter, honouring Retry-After
+        self.max_retries = max_retries
+        self.client = Anthropic(api_key=self.api_key, max_retries=max_retries)
+        self.aclient = None  # Created on first async request
         self.system_prompt = system_prompt
         self.change_manager = ChangeManager()
+        self.response_cache = ResponseCache("responses")
+        self.max_context_window = MAX_CONTEXT_WINDOW
+        self.max_output_tokens = MAX_OUTPUT_TOKENS
         
-    def request(self, prompt: str, max_tokens: int = 4000) -> str:
-        """Send a request to Claude API and get the response."""
+    def request(self, prompt: str, max_tokens: Optional[int] = None, context: Optional[str] = None) -> str:
+        """Send a request to Claude API and get the response.
+
+        context is sent ahead of the prompt and marked for prompt caching, so
+        large inputs reused across requests (e.g. reference files) are only
+        processed once.
+        """
         if VERBOSE:
-            if self.system_prompt:
-                console.print("\n[yellow]System Prompt:[/yellow]")
-                console.print("=" * 80)
-                console.print(self.system_prompt)
-                console.print("=" * 80)
-            console.print("\n[yellow]User Prompt:[/yellow]")
-            console.print("=" * 80)
-            console.print(prompt)
-            console.print("=" * 80)
-        
-        messages: List[MessageParam] = [{"role": "user", "content": prompt}]
+            self._print_prompt(prompt, context)
         
-        response = self.client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=max_tokens,
-            system=self.system_prompt,
-            messages=messages
-        )
+        # Stream the response so long generations are not bound by the
+        # non-streaming request timeout; join the chunks once at the end
+        chunks = []
+        with self.client.messages.stream(**self._message_params(prompt, max_tokens, context)) as stream:
+            for text in stream.text_stream:
+                chunks.append(text)
+            response = stream.get_final_message()
         
-        response_text = response.content[0].text
+        response_text = "".join(chunks)
         
         if VERBOSE:
-            console.print("\n[yellow]Claude Response:[/yellow]")
-            console.print(response_text)
-        
+            self._print_response(response_text, response)
+
         return response_text
 
+    async def arequest(self, prompt: str, max_tokens: Optional[int] = None, context: Optional[str] = None) -> str:
+        """Send a request to Claude API without blocking the event loop."""
+        if self.aclient is None:
+            self.aclient = AsyncAnthropic(api_key=self.api_key, max_retries=self.max_retries)
+
+        if VERBOSE:
+            self._print_prompt(prompt, context)
+
+        chunks = []
+        async with self.aclient.messages.stream(**self._message_params(prompt, max_tokens, context)) as stream:
+            async for text in stream.text_stream:
+                chunks.append(text)
+            response = await stream.get_final_message()
+
+        response_text = "".join(chunks)
+
+        if VERBOSE:
+            self._print_response(response_text, response)
+
+        return response_text
+
+    def _message_params(self, prompt: str, max_tokens: Optional[int], context: Optional[str]) -> dict:
+        """Build the messages API parameters, with cache breakpoints on the system prompt and context."""
+        if max_tokens is None:
+            max_tokens = self.max_output_tokens
+        system = NOT_GIVEN
+        if self.system_prompt:
+            system = [{"type": "text", "text": self.system_prompt, "cache_control": {"type": "ephemeral"}}]
+
+        content = [{"type": "text", "text": prompt}]
+        if context:
+            content.insert(0, {"type": "text", "text": context, "cache_control": {"type": "ephemeral"}})
+        messages: List[MessageParam] = [{"role": "user", "content": content}]
+
+        return {"model": MODEL, "max_tokens": max_tokens, "system": system, "messages": messages}
+
+    def _print_prompt(self, prompt: str, context: Optional[str] = None) -> None:
+        """Print the system and user prompts in verbose mode."""
+        if self.system_prompt:
+            console.print("\n[yellow]System Prompt:[/yellow]")
+            console.print("=" * 80)
+            console.print(self.system_prompt)
+            console.print("=" * 80)
+        console.print("\n[yellow]User Prompt:[/yellow]")
+        console.print("=" * 80)
+        if context:
+            console.print(context)
+        console.print(prompt)
+        console.print("=" * 80)
+
+    def _print_response(self, response_text: str, response) -> None:
+        """Print Claude's response and token usage in verbose mode."""
+        console.print("\n[yellow]Claude Response:[/yellow]")
+        console.print(response_text)
+        # Report the token counts billed by the API rather than estimating them
+        usage = getattr(response, 'usage', None)
+        if usage:
+            console.print(f"[yellow]Used Tokens:[/yellow] {usage.input_tokens} input, {usage.output_tokens} output")
+
+    def check_status(self) -> bool:
+        """Check whether the Anthropic API is reachable with the configured key."""
+        try:
+            self.client.models.list(limit=1)
+            return True
+        except APIError:
+            return False
+
     def get_file_changes(self, content: str, instruction: str, target_name: str = None, filename: str = None) -> str:
         """Get file changes from Claude using the change protocol."""
         prompt = self.change_manager.generate_change_prompt(content, instruction, target_name, filename)
         return self.request(prompt)
 
-    def analyze_file(self, filename: str) -> str:
+    def analyze_file(self, filename: str, use_cache: bool = True) -> str:
         """Analyze a file's content and return a summary."""
-        with open(filename, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        return self.request(f"Here is the file content:\n\n{content}")
+        prompt, key, summary = self._prepare_analysis(filename, use_cache)
+        if summary is None:
+            summary = self.request(prompt)
+            self.response_cache.set(key, summary)
+        return summary
+
+    async def aanalyze_file(self, filename: str, use_cache: bool = True) -> str:
+        """Analyze a file's content concurrently with other requests."""
+        prompt, key, summary = self._prepare_analysis(filename, use_cache)
+        if summary is None:
+            summary = await self.arequest(prompt)
+            self.response_cache.set(key, summary)
+        return summary
+
+    def batch_analyze(self, filenames: List[str], max_tokens: Optional[int] = None, use_cache: bool = True, max_wait: float = MAX_BATCH_WAIT) -> Dict[str, Union[str, Exception]]:
+        """Analyze files through the Message Batches API.
+
+        Returns a dict mapping each filename to its summary, or to an exception
+        describing why its request failed.
+        """
+        results = {}
+        pending = []  # (filename, cache key)
+        requests = []
+        for filename in filenames:
+            try:
+                prompt, key, summary = self._prepare_analysis(filename, use_cache)
+            except (OSError, UnicodeDecodeError) as e:
+                # Report unreadable files without failing the whole batch
+                results[filename] = e
+                continue
+            if summary is not None:
+                results[filename] = summary
+                continue
+            params = {
+                "model": MODEL,
+                "max_tokens": max_tokens if max_tokens is not None else self.max_output_tokens,
+                "messages": [{"role": "user", "content": prompt}],
+            }
+            if self.system_prompt:
+                params["system"] = self.system_prompt
+            # custom_id only allows [a-zA-Z0-9_-], so use the request index
+            requests.append({"custom_id": f"file-{len(pending)}", "params": params})
+            pending.append((filename, key))
+
+        if not requests:
+            return results
+
+        batch = self.client.messages.batches.create(requests=requests)
+
+        deadline = time.monotonic() + max_wait
+        delay = 1
+        while batch.processing_status != "ended":
+            if time.monotonic() >= deadline:
+                raise TimeoutError(
+                    f"Batch {batch.id} is still processing after {max_wait:.0f}s. "
+                    f"Its results stay available through the Message Batches API."
+                )
+            time.sleep(max(0, min(delay, deadline - time.monotonic())))
+            delay = min(delay * 2, MAX_BATCH_POLL_INTERVAL)
+            batch = self.client.messages.batches.retrieve(batch.id)
+
+        for response in self.client.messages.batches.results(batch.id):
+            filename, key = pending[int(response.custom_id.split('-', 1)[1])]
+            result = response.result
+            if result.type == "succeeded":
+                results[filename] = result.message.content[0].text
+                self.response_cache.set(key, results[filename])
+            elif result.type == "errored":
+                results[filename] = RuntimeError(result.error.error.message)
+            else:
+                results[filename] = RuntimeError(f"Batch request {result.type}")
+        return results
+
+    def _prepare_analysis(self, filename: str, use_cache: bool):
+        """Return the prompt, the cache key and the cached summary (or None) for a file."""
+        content = self.change_manager.read_file(filename)
+        prompt = f"Here is the file content:\n\n{content}"
+        key = self.response_cache.key(MODEL, self.system_prompt or "", prompt)
+        summary = self.response_cache.get(key) if use_cache else None
+        return prompt, key, summary
 
     def create_file_content(self, instruction: str, filename: str = None, description: str = None, reference_files: dict = None) -> str:
         """Create new file content based on the instruction and optional parameters."""
-        # Build reference files section if provided
-        reference_section = ""
-        if reference_files:
-            for ref_filename, ref_content in reference_files.items():
-                reference_section += f"""<inputfile>
-<filename>{ref_filename}</filename>
-<content>
-{ref_content}
-</content>
-</inputfile>
-"""
-
         prompt = f"""Please create a new file using this format:
 
 <outputfile>
@@ -88,31 +251,20 @@ Filename: {filename or 'file'}
 {f"Description: {description}" if description else ""}
 
 Requirements:
-{instruction}
+{instruction}"""
 
-{reference_section}"""
-
-        response = self.request(prompt)
+        # Reference files go first, as a cacheable context block
+        context = self._reference_section(reference_files, prompt) if reference_files else None
+        response = self.request(prompt, context=context)
         
         # Extract content from response using ChangeManager
         instructions = self.change_manager.parse_edit_instructions(response, "")
-        if instructions and instructions[0]['action'] == 'replace':
-            return instructions[0]['content']
+        if instructions and instructions[0].action == 'replace':
+            return instructions[0].content
         raise ValueError("Failed to generate valid file content")
 
     def get_update_suggestions(self, content: str, filename: str, reference_files: dict) -> str:
         """Analyze reference files and suggest updates for the target file."""
-        # Build reference files section
-        reference_section = ""
-        for ref_filename, ref_content in reference_files.items():
-            reference_section += f"""<inputfile>
-<filename>{ref_filename}</filename>
-<content>
-{ref_content}
-</content>
-</inputfile>
-"""
-
         prompt = f"""Target file to update:
 
 <inputfile>
@@ -122,11 +274,37 @@ Requirements:
 </content>
 </inputfile>
 
-Reference files:
-{reference_section}
-
 Please analyze the reference files and suggest updates to make the target file consistent with patterns and practices found in the reference files.
 Only provide an <outputfile> section if changes are needed."""
 
-        return self.request(prompt)
+        return self.request(prompt, context=self._reference_section(reference_files, prompt))
+
+    def _reference_section(self, reference_files: dict, prompt: str) -> str:
+        """Format reference files as <inputfile> blocks, truncated to fit the context window."""
+        budget_tokens = self.max_context_window - self.max_output_tokens - len(prompt) // CHARS_PER_TOKEN - CONTEXT_MARGIN
+        remaining = max(budget_tokens, 0) * CHARS_PER_TOKEN
 
+        # Share the budget evenly, letting files smaller than their share
+        # hand what they don't use to the larger ones
+        contents = {}
+        truncated = False
+        by_size = sorted(reference_files.items(), key=lambda item: len(item[1]))
+        for idx, (ref_filename, ref_content) in enumerate(by_size):
+            share = remaining // (len(by_size) - idx)
+            contents[ref_filename] = _truncate_middle(ref_content, share)
+            truncated = truncated or len(contents[ref_filename]) != len(ref_content)
+            remaining -= len(contents[ref_filename])
+
+        reference_section = "Reference files:\n"
+        if truncated:
+            reference_section += "Reference files may be truncated; treat them as excerpts.\n"
+        for ref_filename in reference_files:
+            ref_content = contents[ref_filename]
+            reference_section += f"""<inputfile>
+<filename>{ref_filename}</filename>
+<content>
+{ref_content}
+</content>
+</inputfile>
+"""
+        return reference_section
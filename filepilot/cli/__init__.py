@@ -1,7 +1,6 @@
 from typer import Typer
-from rich.console import Console
+from ..console import console
 
-console = Console()
 app = Typer()
 
 @app.callback()
@@ -1,14 +1,17 @@
 import os
+import stat
+import asyncio
 import typer
 from typing import List
 from rich.panel import Panel
 from rich.markdown import Markdown
 from rich.progress import Progress, SpinnerColumn, TextColumn
-from ..claude import APIAgent
+from ..claude import APIAgent, MAX_BATCH_WAIT
+from ..config import VERBOSE
 from . import console, app
 
-# Check verbose mode from environment
-VERBOSE = os.getenv('VERBOSE_MODE', '').lower() in ('true', '1', 'yes')
+# Maximum number of files analyzed at the same time
+MAX_CONCURRENT_REQUESTS = 8
 
 SYSTEM_PROMPT = """You are a software developer. Analyze the provided file and provide a concise summary of its purpose.
 
@@ -20,44 +23,83 @@ Important rules:
 5. Don't describe the code structure, focus on functionality
 """
 
+async def _analyze_files(agent: APIAgent, filenames: List[str], use_cache: bool) -> list:
+    """Analyze files concurrently, returning a summary or the raised exception per file."""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+
+    async def analyze_one(filename: str) -> str:
+        async with semaphore:
+            return await agent.aanalyze_file(filename, use_cache=use_cache)
+
+    return await asyncio.gather(*(analyze_one(f) for f in filenames), return_exceptions=True)
+
 @app.command()
-def analyze(filenames: List[str]):
+def analyze(
+    filenames: List[str],
+    batch: bool = typer.Option(False, "--batch", help="Submit all files as one Message Batch (cheaper, but results may take minutes)"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Ignore cached summaries and ask Claude again"),
+    batch_timeout: int = typer.Option(MAX_BATCH_WAIT // 60, "--batch-timeout", help="Minutes to wait for a --batch to finish")
+):
     """Get a concise summary of one or more files' purposes."""
     agent = APIAgent(system_prompt=SYSTEM_PROMPT)
 
-    for idx, filename in enumerate(filenames):
+    files_to_analyze = []
+    for filename in filenames:
+        # One stat per file answers both "does it exist" and "is it a directory"
         try:
-            if idx > 0:
-                console.print()  # Add spacing between files
-                
-            if not os.path.exists(filename):
-                console.print(f"[red]Error:[/red] File '{filename}' does not exist")
-                continue
-
-            # Skip directories silently
-            if os.path.isdir(filename):
-                continue
-
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                console=console
-            ) as progress:
-                progress.add_task(f"[blue]Analyzing {filename}[/blue]...", total=None)
-                summary = agent.analyze_file(filename)
-            
-            console.print()
-            console.print(Panel(
-                Markdown(summary),
-                title=f"Summary: {filename}",
-                expand=False
-            ))
-
-            if VERBOSE:
-                console.print("\n[dim]Raw API Response:[/dim]")
-                console.print(Panel(agent.last_raw_response, expand=False))
-                
-        except Exception as e:
+            st = os.stat(filename)
+        except FileNotFoundError:
+            console.print(f"[red]Error:[/red] File '{filename}' does not exist")
+            continue
+        except OSError as e:
+            console.print(f"[red]Error:[/red] Cannot access '{filename}': {e.strerror}")
+            continue
+
+        # Skip directories silently
+        if stat.S_ISDIR(st.st_mode):
+            continue
+
+        files_to_analyze.append(filename)
+
+    if not files_to_analyze:
+        return
+
+    # Send all requests at once, so the total wait is about the slowest file
+    target = files_to_analyze[0] if len(files_to_analyze) == 1 else f"{len(files_to_analyze)} files"
+    try:
+        with Progress(
+            SpinnerColumn(),
+            TextColumn("[progress.description]{task.description}"),
+            console=console
+        ) as progress:
+            progress.add_task(f"[blue]Analyzing {target}[/blue]...", total=None)
+            if batch:
+                batch_results = agent.batch_analyze(files_to_analyze, use_cache=not no_cache, max_wait=batch_timeout * 60)
+                results = [batch_results[f] for f in files_to_analyze]
+            else:
+                results = asyncio.run(_analyze_files(agent, files_to_analyze, use_cache=not no_cache))
+    except Exception as e:
+        # Per-file failures are reported below; this is the request itself failing
+        console.print("[red]Error running the analysis:[/red]")
+        console.print(Panel(str(e), title="Error Details", border_style="red"))
+        raise typer.Exit(1)
+
+    for idx, (filename, summary) in enumerate(zip(files_to_analyze, results)):
+        if idx > 0:
+            console.print()  # Add spacing between files
+
+        if isinstance(summary, Exception):
             console.print(f"[red]Error analyzing {filename}:[/red]")
-            console.print(Panel(str(e), title="Error Details", border_style="red"))
-            continue
\ No newline at end of file
+            console.print(Panel(str(summary), title="Error Details", border_style="red"))
+            continue
+
+        console.print()
+        console.print(Panel(
+            Markdown(summary),
+            title=f"Summary: {filename}",
+            expand=False
+        ))
+
+        if VERBOSE:
+            console.print("\n[dim]Raw API Response:[/dim]")
+            console.print(Panel(summary, expand=False))
@@ -1,12 +1,12 @@
-import os
 import typer
 import traceback
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.prompt import Confirm
-from ..claude import APIAgent
+from ..claude import APIAgent, MODEL
 from ..changemanager import ChangeManager, NoChangesFoundError
 from . import console, app
-from ..syntaxdiff import create_syntax_diff
+from ..syntaxdiff import create_content_diff
+from ..responsecache import ResponseCache
 
 SYSTEM_PROMPT = """You are a software developer. Process a request for changes to files using this format:
 
@@ -31,9 +31,14 @@ def change(
     filename: str, 
     instruction: str,
     diff: bool = typer.Option(False, "--diff", "-d", help="Only show diff without applying changes"),
-    yes: bool = typer.Option(False, "--yes", "-y", help="Automatically apply changes without prompting")
+    yes: bool = typer.Option(False, "--yes", "-y", help="Automatically apply changes without prompting"),
+    cache: bool = typer.Option(False, "--cache", help="Reuse the suggestion from a previous identical run instead of asking Claude again")
 ):
     """Modify an existing file based on the given instruction."""
+    if not instruction.strip():
+        console.print("[yellow]No instruction given, nothing to change[/yellow]")
+        raise typer.Exit(0)
+
     try:
         agent = APIAgent(system_prompt=SYSTEM_PROMPT)
         change_manager = ChangeManager()
@@ -41,27 +46,37 @@ def change(
         try:
             # Let ChangeManager handle file operations
             original_content = change_manager.read_file(filename)
-            
-            with Progress(
-                SpinnerColumn(),
-                TextColumn("[progress.description]{task.description}"),
-                console=console,
-                disable=change_manager.verbose
-            ) as progress:
-                task = progress.add_task("Requesting changes from Claude...", total=None)
-                response = agent.get_file_changes(original_content, instruction, filename=filename)
-                progress.update(task, completed=True)
+
+            # Suggestions vary between runs, so only replay a previous one on request
+            edit_cache = ResponseCache("edits")
+            cache_key = edit_cache.key(MODEL, SYSTEM_PROMPT, filename, original_content, instruction)
+            response = edit_cache.get(cache_key) if cache else None
+            if response is not None:
+                console.print("[dim]Using the suggestion cached from a previous run[/dim]")
+            else:
+                with Progress(
+                    SpinnerColumn(),
+                    TextColumn("[progress.description]{task.description}"),
+                    console=console,
+                    disable=change_manager.verbose
+                ) as progress:
+                    task = progress.add_task("Requesting changes from Claude...", total=None)
+                    response = agent.get_file_changes(original_content, instruction, filename=filename)
+                    progress.update(task, completed=True)
 
             try:
                 # Pass original_content to parse_edit_instructions
                 instructions = change_manager.parse_edit_instructions(response, original_content)
+                # Only cache responses that contain usable edits
+                edit_cache.set(cache_key, response)
                 modified_content = change_manager.apply_edit_instructions_to_content(original_content, instructions)
                 
                 # Let ChangeManager handle preview and diff
                 preview_file = change_manager.create_preview_with_content(filename, modified_content)
                 
                 try:
-                    diff_count, diff_output = create_syntax_diff(filename, preview_file)
+                    # Diff the contents we already hold instead of reading both files back
+                    diff_count, diff_output = create_content_diff(original_content, modified_content, filename, preview_file)
                     if diff_count > 0:
                         console.print(diff_output)
                         if not diff:
@@ -85,6 +100,8 @@ def change(
                 console.print(traceback.format_exc())
                 raise typer.Exit(1)
             
+    except typer.Exit:
+        raise
     except Exception as e:
         if not isinstance(e, NoChangesFoundError):
             console.print("[red]Error in change command:[/red]")
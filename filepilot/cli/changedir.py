@@ -5,28 +5,32 @@ import traceback
 from pathlib import Path
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.prompt import Confirm
-from rich.tree import Tree
 from ..claude import APIAgent
 from ..changemanager import ChangeManager, NoChangesFoundError
+from ..fileio import IO_BUFFER_SIZE, decode_text
 from . import console, app
 from ..syntaxdiff import create_syntax_diff
 
 def read_file_safely(filepath: str) -> tuple[bool, str]:
     """Try to read a file with different encodings, return success and content."""
     encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-    
+
+    # Read once and try each encoding in memory instead of reopening the file
+    try:
+        with open(filepath, 'rb', buffering=IO_BUFFER_SIZE) as f:
+            data = f.read()
+    except Exception:
+        return False, ''
+
+    # Check if content seems like text
+    if b'\0' in data:  # Binary file check
+        return False, ''
+
     for encoding in encodings:
         try:
-            with open(filepath, 'r', encoding=encoding) as f:
-                content = f.read()
-                # Check if content seems like text
-                if '\0' in content:  # Binary file check
-                    return False, ''
-                return True, content
+            return True, decode_text(data, encoding)
         except (UnicodeDecodeError, UnicodeError):
             continue
-        except Exception:
-            return False, ''
     return False, ''
 
 def is_text_file(filepath: str) -> bool:
@@ -163,12 +167,12 @@ Files to process:
         changes_found = False
         
         for instr in instructions:
-            if instr.get('filename') in matched_files:  # Removed action=='replace' check
+            if instr.filename in matched_files:  # Removed action=='replace' check
                 changes_found = True
-                filename = instr['filename']
+                filename = instr.filename
                 console.print(f"\n[blue]Processing changes for {filename}...[/blue]")
                 
-                preview_file = change_manager.create_preview_with_content(filename, instr['content'])
+                preview_file = change_manager.create_preview_with_content(filename, instr.content)
                 try:
                     diff_count, diff_output = create_syntax_diff(filename, preview_file)
                     if diff_count > 0:
@@ -187,6 +191,8 @@ Files to process:
         if not changes_found:
             console.print("\n[yellow]No changes were suggested for any files[/yellow]")
 
+    except typer.Exit:
+        raise
     except Exception as e:
         if not isinstance(e, NoChangesFoundError):
             console.print("[red]Error in changedir command:[/red]")
@@ -1,12 +1,14 @@
 import os
+import stat
 import typer
 import traceback
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich.prompt import Confirm
 from rich.panel import Panel
 from ..claude import APIAgent
+from ..fileio import read_texts
 from . import console, app
-from typing import Optional, List
+from typing import List
 
 SYSTEM_PROMPT = """You are a software developer who creates new files based on user requirements.
 Provide your output using a consistent XML format.
@@ -38,28 +40,31 @@ def create(
             
         agent = APIAgent(system_prompt=SYSTEM_PROMPT)
         valid_reference_files = []
+        reference_sizes = {}
         
         # Validate reference files exist and are not directories
         if reference_files:
             for ref_file in reference_files:
-                if not os.path.exists(ref_file):
+                try:
+                    st = os.stat(ref_file)
+                except FileNotFoundError:
                     console.print(f"[red]Error:[/red] Reference file '{ref_file}' does not exist")
                     raise typer.Exit(1)
-                if os.path.isdir(ref_file):
+                if stat.S_ISDIR(st.st_mode):
                     console.print(f"[yellow]Warning:[/yellow] Skipping directory '{ref_file}'")
                     continue
                 valid_reference_files.append(ref_file)
+                reference_sizes[ref_file] = st.st_size
 
         # Read reference files content
         reference_contents = {}
         if valid_reference_files:
             console.print("\n[blue]Using reference files:[/blue]")
             for ref_file in valid_reference_files:
-                ref_size = os.path.getsize(ref_file) / 1024  # Size in KB
+                ref_size = reference_sizes[ref_file] / 1024  # Size in KB
                 console.print(f"  • [cyan]{ref_file}[/cyan] ({ref_size:.1f} KB)")
-                with open(ref_file, 'r', encoding='utf-8') as f:
-                    reference_contents[ref_file] = f.read()
             console.print()
+            reference_contents = read_texts(valid_reference_files)
         
         with Progress(
             SpinnerColumn(),
@@ -89,6 +94,8 @@ def create(
         
         console.print(f"[green]✓ Successfully created[/green] [cyan]{filename}[/cyan]")
         
+    except typer.Exit:
+        raise
     except Exception as e:
         console.print("[red]Error creating file:[/red]")
         console.print(traceback.format_exc())
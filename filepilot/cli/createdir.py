@@ -1,4 +1,3 @@
-import os
 import typer
 import traceback
 from pathlib import Path
@@ -60,8 +59,8 @@ def createdir(
             # Show tree preview before creating files
             tree = Tree(f"[bold blue]{dirname}[/bold blue]")
             for instr in instructions:
-                if instr['action'] == 'replace':
-                    rel_path = Path(instr['filename']).relative_to(dirname) if dirname in instr['filename'] else Path(instr['filename'])
+                if instr.action == 'replace':
+                    rel_path = Path(instr.filename).relative_to(dirname) if dirname in instr.filename else Path(instr.filename)
                     parts = rel_path.parts
                     current = tree
                     for i, part in enumerate(parts[:-1]):
@@ -84,11 +83,11 @@ def createdir(
             
             # Create files in preview directory
             for instr in instructions:
-                if instr['action'] == 'replace':
-                    file_path = Path(preview_dir) / Path(instr['filename']).relative_to(dirname) \
-                        if dirname in instr['filename'] else Path(preview_dir) / instr['filename']
+                if instr.action == 'replace':
+                    file_path = Path(preview_dir) / Path(instr.filename).relative_to(dirname) \
+                        if dirname in instr.filename else Path(preview_dir) / instr.filename
                     file_path.parent.mkdir(parents=True, exist_ok=True)
-                    file_path.write_text(instr['content'])
+                    file_path.write_text(instr.content)
             
             # Apply directory changes through change manager
             change_manager.apply_dir_changes(dirname, preview_dir)
@@ -96,6 +95,8 @@ def createdir(
         finally:
             change_manager.cleanup_preview(preview_dir)
             
+    except typer.Exit:
+        raise
     except Exception as e:
         console.print("[red]Error creating directory structure:[/red]")
         console.print(traceback.format_exc())
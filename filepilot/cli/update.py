@@ -5,6 +5,7 @@ import traceback
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from ..claude import APIAgent
 from ..changemanager import ChangeManager, NoChangesFoundError
+from ..fileio import read_texts
 from . import console, app
 from typing import List
 
@@ -43,14 +44,14 @@ def update(
         if reference_files:
             console.print("\n[blue]Using reference files:[/blue]")
             for ref_file in reference_files:
-                if not os.path.exists(ref_file):
+                try:
+                    ref_size = os.stat(ref_file).st_size / 1024  # Size in KB
+                except FileNotFoundError:
                     console.print(f"[red]Error:[/red] Reference file '{ref_file}' does not exist")
                     raise typer.Exit(1)
-                ref_size = os.path.getsize(ref_file) / 1024  # Size in KB
                 console.print(f"  • [cyan]{ref_file}[/cyan] ({ref_size:.1f} KB)")
-                with open(ref_file, 'r', encoding='utf-8') as f:
-                    reference_contents[ref_file] = f.read()
             console.print()
+            reference_contents = read_texts(reference_files)
 
         with Progress(
             SpinnerColumn(),
@@ -81,6 +82,8 @@ def update(
         except NoChangesFoundError:
             console.print("[yellow]No updates were suggested[/yellow]")
 
+    except typer.Exit:
+        raise
     except Exception as e:
         console.print("[red]Error in update command:[/red]")
         console.print(traceback.format_exc())
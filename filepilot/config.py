@@ -0,0 +1,7 @@
+"""
+Settings read from the environment, parsed once at import time
+"""
+import os
+
+# Print prompts, responses and edit details
+VERBOSE = os.getenv('VERBOSE_MODE', '').lower() in ('true', '1', 'yes')
@@ -0,0 +1,6 @@
+"""
+Rich console shared by all Filepilot modules
+"""
+from rich.console import Console
+
+console = Console()
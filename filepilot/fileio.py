@@ -0,0 +1,42 @@
+"""
+File reading helpers shared by the Filepilot commands
+"""
+import os
+import mmap
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+# Buffer size used for whole-file reads and writes
+IO_BUFFER_SIZE = 1 << 20
+
+# Upper bound on threads used to read several files at once
+MAX_READ_WORKERS = 16
+
+# Files at least this large are decoded straight from a memory map
+MMAP_THRESHOLD = 1 << 20
+
+def decode_text(data, encoding: str = 'utf-8') -> str:
+    """Decode bytes-like data, translating line endings the way text mode does."""
+    text = str(data, encoding)
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+def read_text(filename: str) -> str:
+    """Read a file as UTF-8 text."""
+    if os.stat(filename).st_size < MMAP_THRESHOLD:
+        with open(filename, 'r', encoding='utf-8', buffering=IO_BUFFER_SIZE) as f:
+            return f.read()
+
+    # Decode from the mapped pages, skipping the intermediate bytes copy
+    with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        return decode_text(mm)
+
+def read_texts(filenames: List[str]) -> Dict[str, str]:
+    """Read several files concurrently, returning their contents in the given order."""
+    if len(filenames) < 2:
+        return {filename: read_text(filename) for filename in filenames}
+    with ThreadPoolExecutor(max_workers=min(MAX_READ_WORKERS, len(filenames))) as executor:
+        return dict(zip(filenames, executor.map(read_text, filenames)))
@@ -0,0 +1,43 @@
+"""
+On-disk cache of Claude responses, keyed by everything that produced them
+"""
+import os
+import hashlib
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from typing import Optional
+
+def default_cache_dir() -> Path:
+    """Return the per-user cache directory for Filepilot."""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return Path(base) / 'filepilot'
+
+class ResponseCache:
+    def __init__(self, namespace: str, cache_dir: Optional[Path] = None):
+        self.path = (cache_dir or default_cache_dir()) / namespace
+
+    def key(self, *parts: str) -> str:
+        """Build a cache key from the request parts (model, prompts, content...)."""
+        digest = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None if there is none."""
+        try:
+            return (self.path / key[:2] / key).read_text(encoding='utf-8')
+        except OSError:
+            return None
+
+    def set(self, key: str, response: str) -> None:
+        """Store a response. Failures are ignored, the cache is best effort."""
+        entry = self.path / key[:2] / key
+        try:
+            entry.parent.mkdir(parents=True, exist_ok=True)
+            with NamedTemporaryFile('w', encoding='utf-8', dir=entry.parent, delete=False) as f:
+                f.write(response)
+            os.replace(f.name, entry)
+        except OSError:
+            pass
@@ -1,6 +1,134 @@
-import difflib
+import io
+import filecmp
+from pygments.lexers.diff import DiffLexer
+from pygments.lexers.special import TextLexer
 from rich.syntax import Syntax
 from pathlib import Path
+from .console import console
+from .fileio import read_text
+from typing import Iterator, List, Sequence, Tuple
+
+try:
+    # Native minimal insert/delete script, i.e. a longest common
+    # subsequence alignment like Myers' diff (pip install rapidfuzz)
+    from rapidfuzz.distance import Indel
+except ImportError:
+    Indel = None
+
+try:
+    # C implementation of difflib.SequenceMatcher (pip install cdifflib)
+    from cdifflib import CSequenceMatcher as SequenceMatcher
+except ImportError:
+    from difflib import SequenceMatcher
+
+Opcode = Tuple[str, int, int, int, int]
+
+# Below this share of the smaller side's distinct lines found in the other
+# side, the files are shown as fully replaced instead of running the matcher
+MIN_LINE_SIMILARITY = 0.1
+
+# Built once and shared by every diff, instead of Syntax looking up the
+# lexer by name on each render (options match what Syntax would use)
+_DIFF_LEXER = DiffLexer(stripnl=False, ensurenl=True, tabsize=4)
+_PLAIN_LEXER = TextLexer(stripnl=False, ensurenl=True, tabsize=4)
+# Likewise for the theme, which also keeps its resolved token styles cached
+_DIFF_THEME = Syntax.get_theme("monokai")
+
+def _format_range_unified(start: int, stop: int) -> str:
+    """Convert a line range to the unified diff 'start,length' format."""
+    beginning = start + 1  # lines start numbering with one
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1  # empty ranges begin at line just before the range
+    return f"{beginning},{length}"
+
+def _opcodes(a: List[str], b: List[str]) -> List[Opcode]:
+    """Return the edit opcodes turning the lines of a into the lines of b."""
+    # Map each distinct line to a small int so the matcher hashes and
+    # compares ints instead of Python strings; opcode indices are unchanged
+    ids = {}
+    a_ids = [ids.setdefault(line, len(ids)) for line in a]
+    b_ids = [ids.setdefault(line, len(ids)) for line in b]
+
+    # A regenerated file shares almost nothing with the original; a line
+    # by line alignment would cost the most and show the least there.
+    # Measured against the smaller side, so a file that only grew (or only
+    # shrank) still diffs as pure inserts (or deletes)
+    if a and b:
+        a_set, b_set = set(a_ids), set(b_ids)
+        if len(a_set & b_set) < MIN_LINE_SIMILARITY * min(len(a_set), len(b_set)):
+            return [('replace', 0, len(a), 0, len(b))]
+
+    if Indel is None:
+        # autojunk would treat lines repeated in over 1% of a file of 200+
+        # lines (blank lines, closing braces) as junk, giving unstable and
+        # needlessly large diffs on source code
+        return SequenceMatcher(None, a_ids, b_ids, autojunk=False).get_opcodes()
+
+    return _merge_changes(Indel.opcodes(a_ids, b_ids))
+
+def _merge_changes(codes) -> List[Opcode]:
+    """Merge each run of adjacent inserts and deletes into one opcode, so removed lines print first."""
+    merged = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag != 'equal' and merged and merged[-1][0] != 'equal':
+            _, i1, _, j1, _ = merged.pop()
+        if tag != 'equal':
+            tag = 'replace' if i1 < i2 and j1 < j2 else 'delete' if i1 < i2 else 'insert'
+        merged.append((tag, i1, i2, j1, j2))
+    return merged
+
+def _group_opcodes(codes: Sequence[Opcode], n: int = 3) -> Iterator[List[Opcode]]:
+    """Group opcodes into hunks with up to n lines of context, like SequenceMatcher.get_grouped_opcodes."""
+    codes = list(codes)
+    if not codes:
+        codes = [("equal", 0, 1, 0, 1)]
+    # Fixup leading and trailing groups if they show no changes
+    if codes[0][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+    group = []
+    for tag, i1, i2, j1, j2 in codes:
+        # End the current group and start a new one whenever
+        # there is a large range with no changes
+        if tag == 'equal' and i2 - i1 > n * 2:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == 'equal'):
+        yield group
+
+def _unified_diff(a: List[str], b: List[str], fromfile: str, tofile: str, n: int = 3) -> Iterator[str]:
+    """Yield lines in the format of difflib.unified_diff(..., lineterm='')."""
+    started = False
+    for group in _group_opcodes(_opcodes(a, b), n):
+        if not started:
+            started = True
+            yield f"--- {fromfile}"
+            yield f"+++ {tofile}"
+
+        first, last = group[0], group[-1]
+        yield f"@@ -{_format_range_unified(first[1], last[2])} +{_format_range_unified(first[3], last[4])} @@"
+
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                for line in a[i1:i2]:
+                    yield ' ' + line
+                continue
+            if tag in ('replace', 'delete'):
+                for line in a[i1:i2]:
+                    yield '-' + line
+            if tag in ('replace', 'insert'):
+                for line in b[j1:j2]:
+                    yield '+' + line
 
 class SyntaxDiff:
     def __init__(self):
@@ -34,32 +162,62 @@ class SyntaxDiff:
     def create_diff(self, filename1: str, filename2: str, show_line_numbers: bool = True) -> tuple[int, str]:
         """Create a syntax-highlighted diff between two files."""
         try:
-            with open(filename1, 'r', encoding='utf-8') as f1, \
-                 open(filename2, 'r', encoding='utf-8') as f2:
-                content1 = f1.readlines()
-                content2 = f2.readlines()
+            # Compare the raw bytes first; files that differ in size are told
+            # apart from their stat alone, and equal ones skip decoding
+            if filecmp.cmp(filename1, filename2, shallow=False):
+                return 0, ""
+            content1 = read_text(filename1)
+            content2 = read_text(filename2)
         except Exception as e:
             return 0, f"Error reading files: {str(e)}"
 
-        diff = list(difflib.unified_diff(content1, content2, fromfile=filename1, tofile=filename2, lineterm=''))
-        if not diff:
+        return self.create_content_diff(content1, content2, filename1, filename2, show_line_numbers)
+
+    def create_content_diff(self, content1: str, content2: str, filename1: str, filename2: str, show_line_numbers: bool = True) -> tuple[int, str]:
+        """Create a syntax-highlighted diff between two strings already in memory."""
+        # Identical inputs are a plain string compare away from "no changes"
+        if content1 == content2:
             return 0, ""
 
-        language = self.get_file_language(filename1)
-        change_count = len([line for line in diff if line.startswith('+') or line.startswith('-')])
+        # Split on '\n' only, like readlines() on a file opened in text mode
+        lines1 = io.StringIO(content1).readlines()
+        lines2 = io.StringIO(content2).readlines()
+
+        # Consume the diff lines as they are generated, counting changes and
+        # collecting the text in one pass instead of materialising them first
+        change_count = 0
+        buffer = io.StringIO()
+        for line in _unified_diff(lines1, lines2, fromfile=filename1, tofile=filename2):
+            if line.startswith(('+', '-')):
+                change_count += 1
+            buffer.write(line)
+        diff_text = buffer.getvalue()
+        if not diff_text:
+            return 0, ""
+
+        # Colours are dropped when output is not a terminal (pipes, CI logs),
+        # so skip the diff lexer there but keep the same layout
+        lexer = _DIFF_LEXER if console.is_terminal else _PLAIN_LEXER
 
         # Create syntax highlighted diff
-        diff_text = ''.join(diff)
         syntax = Syntax(
             diff_text,
-            "diff",
-            theme="monokai",
+            lexer,
+            theme=_DIFF_THEME,
             line_numbers=show_line_numbers,
             word_wrap=True
         )
         
         return change_count, syntax
 
+    def visualize_diff(self, filename1: str, filename2: str, show_line_numbers: bool = True) -> int:
+        """Print the diff between two files and return the number of changed lines."""
+        change_count, diff = self.create_diff(filename1, filename2, show_line_numbers)
+        if change_count > 0:
+            console.print(diff)
+        return change_count
+
 # Create a global instance for backwards compatibility
 _diff = SyntaxDiff()
-create_syntax_diff = _diff.create_diff
\ No newline at end of file
+create_syntax_diff = _diff.create_diff
+create_content_diff = _diff.create_content_diff
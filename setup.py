@@ -25,10 +25,13 @@ setup(
         ]
     },
     install_requires=[
-        "anthropic",
+        "anthropic>=0.41.0",  # First release with messages.batches and models.list
         "rich",
         "typer[all]"  # Added typer dependency with all extras
     ],
+    extras_require={
+        "speedups": ["rapidfuzz", "cdifflib"],  # Native line diffing
+    },
     entry_points={
         "console_scripts": [
             "filepilot=filepilot.__main__:main",